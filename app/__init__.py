@@ -4,18 +4,24 @@ import sys
 import time
 import base64
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
 from textwrap import wrap
 
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageSequence
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
 from email.mime.base import MIMEBase
-from email import encoders
+from email.generator import BytesGenerator
+from email.policy import compat32
 from base64 import urlsafe_b64encode
 
+from googleapiclient.http import MediaIoBaseUpload
+
 from app.config import Config, ConfigError
 from app.mail.authentication import authenticate
 
@@ -25,6 +31,10 @@ LAST_SENT_FILE = 'last_sent.txt'
 LOG_DIR = 'log'
 GIF_TEMPLATE_PATH = 'static/template.gif'
 FONT_PATH = 'static/arial.ttf'
+BATCH_SIZE = 50  # Messages per Gmail batch request; larger batches risk rateLimitExceeded
+GMAIL_QUOTA_UNITS_PER_SECOND = 250  # Documented per-user Gmail API quota
+SEND_QUOTA_UNITS = 100  # Quota cost of a single messages.send call
+TEXT_WRAP_WIDTH = 30  # Characters per line for the GIF caption
 
 # Ensure log directory exists
 if not os.path.exists(LOG_DIR):
@@ -54,7 +64,6 @@ def load_recipients(csv_file):
     logging.error(f"Recipients file '{csv_file}' not found.")
     sys.exit(1)
 
-  recipients = []
   with open(csv_file, newline='', encoding='utf-8') as csvfile:
     reader = csv.DictReader(csvfile)
     required_headers = {"First Name", "Last Name", "Email", "Phone", "Address", "Profession", "Stage", "Industry", "LinkedIn"}
@@ -62,98 +71,179 @@ def load_recipients(csv_file):
       logging.error(f"CSV file missing required headers. Required headers: {required_headers}")
       sys.exit(1)
 
-    for row in reader:
-      recipients.append(row)
+    # Materialize rows in one pass; the reader streams the file, so no
+    # intermediate copy of the whole CSV is held alongside the rows
+    recipients = list(reader)
   logging.info(f"Loaded {len(recipients)} recipients from '{csv_file}'.")
   return recipients
 
 def get_last_sent():
   if os.path.exists(LAST_SENT_FILE):
     with open(LAST_SENT_FILE, 'r') as f:
-      last_email = f.read().strip()
-      if last_email:
-        logging.info(f"Last sent email retrieved: {last_email}")
-        return last_email
+      last_sent = f.read().strip()
+      if last_sent:
+        logging.info(f"Last sent marker retrieved: {last_sent}")
+        return last_sent
       else:
         logging.info(f"Last sent file '{LAST_SENT_FILE}' is empty.")
         return None
   return None
 
-def set_last_sent(email):
-  with open(LAST_SENT_FILE, 'w') as f:
-    f.write(email)
-  logging.debug(f"Set last sent email to: {email}")
+def set_last_sent(index, email):
+  # Write via a temp file + os.replace so a crash mid-write can never
+  # leave a truncated marker behind
+  tmp_file = LAST_SENT_FILE + '.tmp'
+  with open(tmp_file, 'w') as f:
+    f.write(f"{index}\t{email}")
+  os.replace(tmp_file, LAST_SENT_FILE)
+  logging.debug("Set last sent marker to: %s %s", index, email)
+
+# Decoded GIF template shared across all recipients, filled in on first use
+_TEMPLATE_CACHE = {}
+
+# Parsed font shared across all recipients, loaded on first use
+_FONT = None
+
+def _get_font():
+  """ Returns the template font, parsing the TTF only on the first call. """
+  global _FONT
+  if _FONT is None:
+    _FONT = ImageFont.truetype(FONT_PATH, 24)
+  return _FONT
+
+def _load_template():
+  """
+  Decodes the GIF template once and caches the RGBA frames, frame metadata
+  and a single global palette at module scope. Only the text layer differs
+  per recipient, so the expensive decode and palette build happen one time.
+  """
+  if _TEMPLATE_CACHE:
+    return _TEMPLATE_CACHE
+
+  with Image.open(GIF_TEMPLATE_PATH) as img:
+    frames = [np.asarray(frame.convert('RGBA')) for frame in ImageSequence.Iterator(img)]
+    _TEMPLATE_CACHE['frames'] = frames
+    _TEMPLATE_CACHE['size'] = img.size
+    _TEMPLATE_CACHE['duration'] = img.info.get('duration', 100)
+    _TEMPLATE_CACHE['transparency'] = img.info.get('transparency')
+    # One global palette reused for every frame instead of an adaptive
+    # palette built per frame per recipient
+    palette = Image.fromarray(frames[0]).convert('RGB').quantize(colors=255, method=Image.Quantize.FASTOCTREE)
+    _TEMPLATE_CACHE['palette'] = palette
+    # Frames pre-quantized to the global palette; recipients only need to
+    # requantize the region their text overlay touches
+    _TEMPLATE_CACHE['quantized'] = [
+      Image.fromarray(frame).convert('RGB').quantize(palette=palette, dither=Image.Dither.NONE)
+      for frame in frames
+    ]
+
+  logging.debug(f"Cached {len(frames)} template frames from '{GIF_TEMPLATE_PATH}'.")
+  return _TEMPLATE_CACHE
+
+@lru_cache(maxsize=32)
+def _render_gif(first_name):
+  """
+  Renders the GIF bytes for a first name. The name is the only
+  recipient-dependent input, so recipients sharing a first name reuse the
+  same rendered bytes instead of re-running the frame pipeline.
+  """
+  template = _load_template()
+  text = f"Look at you, {first_name}! Working harder than Sparky to be sustainable!"
+  font = _get_font()
+
+  # Wrap text for readability
+  wrapped_text = "\n".join(wrap(text, width=TEXT_WRAP_WIDTH))
+
+  # Rasterize the text once onto a transparent overlay; each frame only
+  # needs an alpha-composite instead of a fresh glyph render
+  overlay = Image.new('RGBA', template['size'], (0, 0, 0, 0))
+  overlay_draw = ImageDraw.Draw(overlay)
+
+  # Calculate text placement
+  left, top, right, bottom = overlay_draw.multiline_textbbox((0, 0), wrapped_text, font=font)
+  text_width = right - left
+  text_height = bottom - top
+  text_x = (template['size'][0] - text_width) // 2
+  text_y = (template['size'][1] - text_height) // 2
+
+  overlay_draw.multiline_text((text_x, text_y), wrapped_text, fill=(255, 255, 255), font=font)
+
+  # Only the region covered by the text overlay differs from the cached
+  # pre-quantized frames, so composite and requantize just that slice
+  bbox = overlay.getbbox()
+
+  def composited_frames():
+    for frame_array, quantized in zip(template['frames'], template['quantized']):
+      frame = quantized.copy()
+      if bbox:
+        left, top, right, bottom = bbox
+        region = Image.alpha_composite(
+          Image.fromarray(frame_array[top:bottom, left:right]),
+          overlay.crop(bbox)
+        )
+        frame.paste(
+          region.convert('RGB').quantize(palette=template['palette'], dither=Image.Dither.NONE),
+          (left, top)
+        )
+      yield frame
+
+  # Stream frames into the encoder as they are composited instead of
+  # materializing the full list first
+  frame_iter = composited_frames()
+  first_frame = next(frame_iter)
+
+  buffer = BytesIO()
+  if len(template['frames']) > 1:
+    first_frame.save(
+      buffer,
+      format='GIF',
+      save_all=True,
+      append_images=frame_iter,
+      loop=0,
+      duration=template['duration'],
+      transparency=template['transparency'],
+      disposal=2
+    )
+  else:
+    first_frame.save(buffer, format='GIF', transparency=template['transparency'])
+
+  return buffer.getvalue()
 
 def generate_funny_image(recipient):
   """
   Generates a customized GIF with embedded text for the recipient.
-  Returns the binary data of the GIF.
+  Rendering is memoized by first name, so repeat names skip the frame
+  pipeline entirely. Returns the binary data of the GIF.
   """
   try:
-    with Image.open(GIF_TEMPLATE_PATH) as img:
-      frames = []
-      text = f"Look at you, {recipient['First Name']}! Working harder than Sparky to be sustainable!"
-      font_size = 24  # Adjust as needed
-      font = ImageFont.truetype(FONT_PATH, font_size)
-
-      try:
-        transparency = img.info.get("transparency")
-        while True:
-          frame = img.convert('RGBA')
-          draw = ImageDraw.Draw(frame)
-
-          # Wrap text for readability
-          wrapped_text = "\n".join(wrap(text, width=30))
-
-          # Calculate text placement
-          text_width, text_height = draw.multiline_textsize(wrapped_text, font=font)
-          text_x = (img.size[0] - text_width) // 2
-          text_y = (img.size[1] - text_height) // 2
-
-          draw.multiline_text((text_x, text_y), wrapped_text, fill=(255, 255, 255), font=font)
-
-          # Convert back to palette-based mode for GIF
-          frame = frame.convert('P', palette=Image.ADAPTIVE)
-          frames.append(frame)
-
-          img.seek(img.tell() + 1)
-      except EOFError:
-        pass  # End of frames
-
-      # Save all frames to a buffer
-      buffer = BytesIO()
-      if len(frames) > 1:
-        frames[0].save(
-          buffer,
-          format='GIF',
-          save_all=True,
-          append_images=frames[1:],
-          loop=0,
-          duration=img.info.get('duration', 100),
-          transparency=transparency,
-          disposal=2
-        )
-      else:
-        frames[0].save(buffer, format='GIF', transparency=transparency)
-
-      buffer.seek(0)
-      gif_data = buffer.read()
-      logging.debug(f"Generated GIF for {recipient['Email']}.")
-      return gif_data
+    gif_data = _render_gif(recipient['First Name'])
+    logging.debug("Generated GIF for %s.", recipient['Email'])
+    return gif_data
   except Exception as e:
     logging.error(f"Failed to generate funny image for {recipient['Email']}: {e}")
     raise
 
-def generate_email_body(recipient, image_cid):
+# HTML template shared across all recipients, read on first use
+_EMAIL_TEMPLATE = None
+
+def _load_email_template():
+  """ Returns the HTML template, reading the file only on the first call. """
+  global _EMAIL_TEMPLATE
+  if _EMAIL_TEMPLATE is None:
+    with open('template.html', 'r', encoding='utf-8') as f:
+      _EMAIL_TEMPLATE = f.read()
+  return _EMAIL_TEMPLATE
+
+def generate_email_body(recipient, image_src):
   """
-  Generates the HTML body of the email, embedding the GIF via CID.
+  Generates the HTML body of the email. image_src is either a cid: URI for
+  an inline GIF or the URL of an externally hosted one.
   """
   try:
-    with open('template.html', 'r', encoding='utf-8') as f:
-      template = f.read()
-    
-    dynamic_image = f'<img src="cid:{image_cid}" alt="Sparky doing push-ups">'
-    
+    template = _load_email_template()
+
+    dynamic_image = f'<img src="{image_src}" alt="Sparky doing push-ups">'
+
     body = template.format(
       first_name=recipient['First Name'],
       email=recipient['Email'],
@@ -164,12 +254,20 @@ def generate_email_body(recipient, image_cid):
     logging.error(f"Failed to load email template: {e}")
     raise
 
-def build_message(destination, subject, body, gif_data, gif_cid, attachments=None, config=None):
+@lru_cache(maxsize=32)
+def _encode_gif_payload(gif_data):
+  """
+  Returns the base64 transfer-encoding of the GIF bytes. Cached so that
+  identical GIF payloads are encoded once rather than per message.
+  """
+  return base64.encodebytes(gif_data).decode('ascii')
+
+def build_mime_message(destination, subject, body, gif_data, gif_cid, attachments=None, config=None):
   """
   Builds a MIME message with embedded GIF and optional attachments.
   """
   if config is None:
-    raise ValueError("A config instance must be provided to build_message.")
+    raise ValueError("A config instance must be provided to build_mime_message.")
 
   # Create the root message with 'related' subtype to handle embedded images
   msg_root = MIMEMultipart('related')
@@ -185,9 +283,12 @@ def build_message(destination, subject, body, gif_data, gif_cid, attachments=Non
   msg_text = MIMEText(body, 'html')
   msg_alternative.attach(msg_text)
 
-  # Attach the GIF image
+  # Attach the GIF image with a pre-encoded payload; MIMEImage would
+  # re-run the base64 encode for every message
   if gif_data and gif_cid:
-    msg_image = MIMEImage(gif_data, _subtype="gif")
+    msg_image = MIMEBase('image', 'gif')
+    msg_image.set_payload(_encode_gif_payload(gif_data))
+    msg_image.add_header('Content-Transfer-Encoding', 'base64')
     msg_image.add_header('Content-ID', f'<{gif_cid}>')
     msg_image.add_header('Content-Disposition', 'inline', filename='funny_sparky.gif')
     msg_root.attach(msg_image)
@@ -197,9 +298,43 @@ def build_message(destination, subject, body, gif_data, gif_cid, attachments=Non
     for filename in attachments:
       add_attachment(msg_root, filename)
 
-  # Encode the message
-  raw_message = urlsafe_b64encode(msg_root.as_bytes()).decode()
-  return {'raw': raw_message}
+  return msg_root
+
+def _serialize_message(msg_root):
+  """
+  Flattens a MIME message to bytes. Single serialization point shared by
+  the batch and media-upload paths; the output is byte-identical to
+  Message.as_bytes(), with the generator settings spelled out explicitly.
+  """
+  fp = BytesIO()
+  BytesGenerator(fp, mangle_from_=False, policy=compat32).flatten(msg_root)
+  return fp.getvalue()
+
+def build_message(destination, subject, body, gif_data, gif_cid, attachments=None, config=None):
+  """
+  Builds the base64url request body expected by batched sends. Single
+  sends should upload the RFC822 bytes directly instead.
+  """
+  msg_root = build_mime_message(
+    destination=destination,
+    subject=subject,
+    body=body,
+    gif_data=gif_data,
+    gif_cid=gif_cid,
+    attachments=attachments,
+    config=config
+  )
+  # base64 output is plain ASCII, so skip the UTF-8 decode machinery
+  return {'raw': urlsafe_b64encode(_serialize_message(msg_root)).decode('ascii')}
+
+@lru_cache(maxsize=32)
+def _read_attachment_payload(path):
+  """
+  Returns the base64 transfer-encoding of an attachment file, cached so
+  attaching the same file to many messages reads and encodes it once.
+  """
+  with open(path, 'rb') as f:
+    return base64.encodebytes(f.read()).decode('ascii')
 
 def add_attachment(message, filename):
   """
@@ -207,28 +342,29 @@ def add_attachment(message, filename):
   """
   try:
     path = os.path.join('attachments', filename)
-    with open(path, 'rb') as f:
-      part = MIMEBase('application', 'octet-stream')
-      part.set_payload(f.read())
-    encoders.encode_base64(part)
+    part = MIMEBase('application', 'octet-stream')
+    part.set_payload(_read_attachment_payload(path))
+    part.add_header('Content-Transfer-Encoding', 'base64')
     part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
     message.attach(part)
-    logging.debug(f"Attached file {filename}.")
+    logging.debug("Attached file %s.", filename)
   except Exception as e:
     logging.error(f"Failed to attach file {filename}: {e}")
     raise
 
-def send_message(destination, subject, body, gif_data, gif_cid, attachments=None, config=None):
+def send_message(destination, subject, body, gif_data, gif_cid, attachments=None, config=None, mail_service=None):
   """
-  Sends the email message via the authenticated mail service.
+  Sends the email message via the authenticated mail service. The service
+  should be built once by the caller and reused across recipients.
   """
   if config is None:
     raise ValueError("A config instance must be passed to send_message.")
 
-  logging.info(f"Sending message to {destination}")
+  logging.info("Sending message to %s", destination)
   try:
-    mail_service = authenticate()
-    message_body = build_message(
+    if mail_service is None:
+      mail_service = authenticate()
+    msg_root = build_mime_message(
       destination=destination,
       subject=subject,
       body=body,
@@ -237,13 +373,66 @@ def send_message(destination, subject, body, gif_data, gif_cid, attachments=None
       attachments=attachments,
       config=config
     )
-    sent_message = mail_service.users().messages().send(userId="me", body=message_body).execute()
-    logging.info(f"Message sent to {destination} with Message ID: {sent_message.get('id')}")
+    # Upload the raw RFC822 bytes instead of inflating them ~33% into a
+    # base64url JSON body; batched sends cannot use media uploads, so
+    # build_message keeps the base64 path for them
+    media = MediaIoBaseUpload(BytesIO(_serialize_message(msg_root)), mimetype='message/rfc822')
+    sent_message = mail_service.users().messages().send(userId="me", body={}, media_body=media).execute()
+    logging.info("Message sent to %s with Message ID: %s", destination, sent_message.get('id'))
     return sent_message
   except Exception as e:
     logging.error(f"Failed to send message to {destination}: {e}")
     raise
 
+class _QuotaThrottle:
+  """
+  Paces batch submissions against the Gmail per-user quota. Instead of a
+  fixed sleep after every batch, the throttle tracks the deadline at which
+  the next batch may start and only sleeps the remaining time, so GIF
+  generation in the worker pool keeps running while the sender waits.
+  """
+
+  def __init__(self, units_per_second):
+    self.units_per_second = units_per_second
+    self._next_allowed = time.monotonic()
+
+  def wait(self):
+    """ Blocks until the current quota window has elapsed. """
+    delay = self._next_allowed - time.monotonic()
+    if delay > 0:
+      logging.debug("Throttling %.1f seconds to stay within the Gmail send quota...", delay)
+      time.sleep(delay)
+
+  def record(self, units):
+    """ Registers spent quota units and schedules the next allowed send. """
+    self._next_allowed = time.monotonic() + units / self.units_per_second
+
+def _send_batch(mail_service, batch_entries, results):
+  """
+  Sends a list of (index, recipient, message_body) entries in a single
+  Gmail batch HTTP request. Fills the caller's results dict, mapping each
+  index to the exception raised for that message, or None if it was
+  delivered; entries delivered before a transport failure stay recorded
+  even if batch.execute() raises.
+  """
+  def _on_sent(request_id, response, exception):
+    index = int(request_id)
+    results[index] = exception
+    if exception is not None:
+      logging.error("Failed to send message (batch entry %s): %s", index, exception)
+    else:
+      logging.info("Message sent with Message ID: %s", response.get('id'))
+
+  batch = mail_service.new_batch_http_request(callback=_on_sent)
+  for index, recipient, message_body in batch_entries:
+    batch.add(
+      mail_service.users().messages().send(userId="me", body=message_body),
+      request_id=str(index)
+    )
+
+  logging.info("Submitting batch of %d messages...", len(batch_entries))
+  batch.execute()
+
 def start():
   logging.info("Starting the email sending process...")
   config = load_config()
@@ -251,30 +440,40 @@ def start():
 
   try:
     subject = config["subject"]
-  except KeyError:
-    logging.error("Config missing 'subject' key.")
-    sys.exit(1)
-
-  try:
     test_mode = config["test"]
-  except KeyError:
-    logging.error("Config missing 'test' key.")
-    sys.exit(1)
-
-  try:
     test_email = config["test_email_recipient"]
-  except KeyError:
-    logging.error("Config missing 'test_email_recipient' key.")
+  except KeyError as e:
+    logging.error(f"Config missing {e} key.")
     sys.exit(1)
 
-  last_sent_email = get_last_sent()
+  # An externally hosted GIF skips per-recipient generation and the inline
+  # attachment entirely; the email just references the URL
+  hosted_gif_url = config.get("hosted_gif_url")
+
+  # Build the Gmail service once and reuse it for every send
+  mail_service = authenticate()
+
+  last_sent = get_last_sent()
   start_index = 0
 
-  if last_sent_email:
-    for i, recipient in enumerate(recipients):
-      if recipient['Email'] == last_sent_email:
-        start_index = i + 1
-        break
+  if last_sent:
+    marker_index, _, marker_email = last_sent.partition('\t')
+    try:
+      index = int(marker_index)
+    except ValueError:
+      index = None
+
+    if index is not None and 0 <= index < len(recipients) \
+        and (not marker_email or recipients[index]['Email'] == marker_email):
+      start_index = index + 1
+    else:
+      # The CSV was edited or reordered since the marker was written, or
+      # the marker is a legacy email-only one; locate the email instead
+      target_email = marker_email or last_sent
+      for i, recipient in enumerate(recipients):
+        if recipient['Email'] == target_email:
+          start_index = i + 1
+          break
 
   total_recipients = len(recipients)
   if start_index >= total_recipients:
@@ -289,12 +488,17 @@ def start():
       sys.exit(1)
     test_recipient = recipients[0]
     try:
-      # Generate GIF data
-      gif_data = generate_funny_image(test_recipient)
-      # Define a unique Content-ID for the GIF
-      gif_cid = "funny_image"
-      # Generate email body with CID reference
-      body = generate_email_body(test_recipient, gif_cid)
+      if hosted_gif_url:
+        gif_data = None
+        gif_cid = None
+        body = generate_email_body(test_recipient, hosted_gif_url)
+      else:
+        # Generate GIF data
+        gif_data = generate_funny_image(test_recipient)
+        # Define a unique Content-ID for the GIF
+        gif_cid = "funny_image"
+        # Generate email body with CID reference
+        body = generate_email_body(test_recipient, f"cid:{gif_cid}")
       # Send the test email
       send_message(
         destination=test_email,
@@ -303,46 +507,87 @@ def start():
         gif_data=gif_data,
         gif_cid=gif_cid,
         attachments=None,
-        config=config
+        config=config,
+        mail_service=mail_service
       )
       logging.info(f"Test email sent to {test_email}.")
     except Exception as e:
       logging.error(f"Failed to send test email to {test_email}: {e}")
     return
 
-  for i in range(start_index, total_recipients):
-    recipient = recipients[i]
-    try:
-      # Generate GIF data
-      gif_data = generate_funny_image(recipient)
-      # Define a unique Content-ID for the GIF
-      gif_cid = "funny_image"
-      # Generate email body with CID reference
-      body = generate_email_body(recipient, gif_cid)
-      # Send the email
-      send_message(
-        destination=recipient['Email'],
-        subject=subject,
-        body=body,
-        gif_data=gif_data,
-        gif_cid=gif_cid,
-        attachments=None,
-        config=config
-      )
-      logging.info(f"Email {i + 1}/{total_recipients} sent to {recipient['Email']}.")
-      set_last_sent(recipient['Email'])
-
-      # Delay to adhere to the sending limits
-      if (i - start_index + 1) % 6 == 0:  # After every 6 emails
-        logging.debug("Hourly limit reached. Waiting for 1 hour...")
-        time.sleep(3600)  # Wait for 1 hour
-      else:
-        logging.debug("Waiting 10 minutes (600 seconds) before sending the next email...")
-        time.sleep(600)  # Wait for 600 seconds between emails
-
-    except Exception as e:
-      logging.error(f"Failed to send email to {recipient['Email']}: {e}")
-      break
+  max_workers = os.cpu_count() or 1
+  window_depth = 2 * max_workers  # Bound in-flight GIFs to limit memory
+
+  batch_entries = []
+  failed = False
+  throttle = _QuotaThrottle(GMAIL_QUOTA_UNITS_PER_SECOND)
+  with ProcessPoolExecutor(max_workers=max_workers) as pool:
+    pending = deque()
+    next_index = start_index
+
+    while (pending or next_index < total_recipients) and not failed:
+      # Keep a bounded window of GIF jobs running ahead of the sender so
+      # CPU-bound encoding overlaps with the Gmail API round-trips
+      while next_index < total_recipients and len(pending) < window_depth:
+        recipient = recipients[next_index]
+        gif_future = pool.submit(generate_funny_image, recipient) if not hosted_gif_url else None
+        pending.append((next_index, recipient, gif_future))
+        next_index += 1
+
+      i, recipient, gif_future = pending.popleft()
+      try:
+        if hosted_gif_url:
+          gif_data = None
+          gif_cid = None
+          body = generate_email_body(recipient, hosted_gif_url)
+        else:
+          # Collect the GIF data generated in the worker process
+          gif_data = gif_future.result()
+          # Define a unique Content-ID for the GIF
+          gif_cid = "funny_image"
+          # Generate email body with CID reference
+          body = generate_email_body(recipient, f"cid:{gif_cid}")
+        # Build the message and queue it for the next batch
+        message_body = build_message(
+          destination=recipient['Email'],
+          subject=subject,
+          body=body,
+          gif_data=gif_data,
+          gif_cid=gif_cid,
+          attachments=None,
+          config=config
+        )
+        batch_entries.append((i, recipient, message_body))
+      except Exception as e:
+        logging.error(f"Failed to prepare email for {recipient['Email']}: {e}")
+        failed = True
+
+      more_to_come = pending or next_index < total_recipients
+      if batch_entries and (failed or len(batch_entries) >= BATCH_SIZE or not more_to_come):
+        results = {}
+        try:
+          # Wait out whatever is left of the previous batch's quota window;
+          # message preparation above already ran during most of it
+          throttle.wait()
+          _send_batch(mail_service, batch_entries, results)
+          throttle.record(len(batch_entries) * SEND_QUOTA_UNITS)
+        except Exception as e:
+          # The per-entry callbacks may have fired before the batch request
+          # itself failed, so fall through and record what was delivered
+          logging.error(f"Batch send failed: {e}")
+          failed = True
+
+        # Record every delivered entry, not just the ones before the first
+        # failure: the batch API completes the later entries regardless, so
+        # stopping the marker early would re-send them after a resume
+        for index, sent_recipient, _ in batch_entries:
+          if index in results and results[index] is None:
+            logging.info("Email %d/%d sent to %s.", index + 1, total_recipients, sent_recipient['Email'])
+            set_last_sent(index, sent_recipient['Email'])
+          else:
+            failed = True
+            logging.error(f"Email to {sent_recipient['Email']} (recipient {index + 1}) was not delivered; resend it manually, resuming will skip it.")
+        batch_entries = []
 
   logging.info("Email sending process completed.")
 
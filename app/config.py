@@ -58,3 +58,7 @@ class Config:
 
     def __getitem__(self, item):
         return self.config_data[item]
+
+    def get(self, item, default=None):
+        """ Returns the value for an optional config key, or the default if it is absent """
+        return self.config_data.get(item, default)
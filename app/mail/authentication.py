@@ -1,13 +1,17 @@
 import os
 import pickle
+from functools import lru_cache
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from app import config
 
 
+@lru_cache(maxsize=1)
 def authenticate():
-    """ Authenticate with Google API for valid credentials """
+    """ Authenticate with Google API for valid credentials. The resulting
+    service is cached so repeated calls reuse one authenticated session
+    instead of re-running the token refresh and discovery fetch. """
     creds = None
     if os.path.exists("token.pickle"):
         with open("token.pickle", "rb") as token: